@@ -1,53 +1,114 @@
 import rclpy
-from geometry_msgs.msg import PoseStamped
+from geometry_msgs.msg import PoseStamped, TransformStamped
 from rclpy.action import ActionClient
 from rclpy.node import Node
-from tf2_geometry_msgs.tf2_geometry_msgs import do_transform_pose
+from rclpy.qos import HistoryPolicy, QoSProfile
 from tf2_ros import Buffer, TransformListener
-from tf_transformations import euler_from_quaternion
 
+from nav_goal_listener.quat_math import transform_pose_yaw
 from spot_action.action import MoveRelativeXY
 
+# Reuse a cached transform for goals arriving within this window (seconds)
+TF_CACHE_MAX_AGE = 0.05
+# Give up on a goal if its transform is not available within this time (seconds)
+TF_LOOKUP_TIMEOUT = 1.0
+
 
 class NavGoalListener(Node):
     def __init__(self):
         super().__init__("nav_goal_listener")
         self.tf_buffer = Buffer()
         self.tf_listener = TransformListener(self.tf_buffer, self)
+        # source frame -> (time of lookup in seconds, transform)
+        self._tf_cache: dict[str, tuple[float, TransformStamped]] = {}
+        # Pending wait for a goal's transform and the timer that gives up on it
+        self._tf_future = None
+        self._tf_timeout_timer = None
 
         self.declare_parameter("robot_frame", "base_link")
         self.robot_frame = self.get_parameter("robot_frame").get_parameter_value().string_value
 
-        self.subscription = self.create_subscription(PoseStamped, "/goal_pose", self.goal_callback, 10)
+        # Latest goal wins; older queued goals are dropped
+        goal_qos = QoSProfile(depth=1, history=HistoryPolicy.KEEP_LAST)
+        self.subscription = self.create_subscription(PoseStamped, "/goal_pose", self.goal_callback, goal_qos)
 
         self._move_client = ActionClient(self, MoveRelativeXY, "move_relative_xy")
+        # send_goal_async serializes the goal before returning, so a single message can be reused
+        self._goal_msg = MoveRelativeXY.Goal()
+
+        # Compile the goal math up front (when numba is available) so the first goal isn't delayed
+        transform_pose_yaw(0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
 
     def goal_callback(self, msg: PoseStamped):
         self.get_logger().info(f"Received goal in frame: {msg.header.frame_id}")
+
+        # Latest goal wins, so drop any goal still waiting for its transform
+        self._clear_pending_transform()
+
+        now = self.get_clock().now().nanoseconds * 1e-9
+        cached = self._tf_cache.get(msg.header.frame_id)
+        if cached is not None and now - cached[0] < TF_CACHE_MAX_AGE:
+            self.send_transformed_goal(msg, cached[1])
+            return
+
+        # Wait for the transform without blocking the executor. The timer is created first because the
+        # done-callback runs immediately if the transform is already available.
+        self._tf_timeout_timer = self.create_timer(TF_LOOKUP_TIMEOUT, lambda: self._on_tf_timeout(msg))
+        self._tf_future = self.tf_buffer.wait_for_transform_async(
+            target_frame=self.robot_frame,
+            source_frame=msg.header.frame_id,
+            time=rclpy.time.Time(),
+        )
+        self._tf_future.add_done_callback(lambda f: self._on_tf_ready(f, msg))
+
+    def _clear_pending_transform(self):
+        # Cancelling the wait also removes its callback from the TF buffer
+        future, self._tf_future = self._tf_future, None
+        if future is not None and not future.done():
+            future.cancel()
+        if self._tf_timeout_timer is not None:
+            self.destroy_timer(self._tf_timeout_timer)
+            self._tf_timeout_timer = None
+
+    def _on_tf_timeout(self, msg: PoseStamped):
+        self._clear_pending_transform()
+        self.get_logger().warn(
+            f"Transform error: {msg.header.frame_id} -> {self.robot_frame} not available "
+            f"after {TF_LOOKUP_TIMEOUT:.1f} s"
+        )
+
+    def _on_tf_ready(self, future, msg: PoseStamped):
+        if future.cancelled():
+            return
+        self._clear_pending_transform()
+
         try:
             transform = self.tf_buffer.lookup_transform(
                 target_frame=self.robot_frame,
                 source_frame=msg.header.frame_id,
                 time=rclpy.time.Time(),
-                timeout=rclpy.duration.Duration(seconds=1.0),
             )
-            transformed_goal = do_transform_pose(msg.pose, transform)
-
         except Exception as e:
             self.get_logger().warn(f"Transform error: {e}")
             return
 
-        if not self._move_client.wait_for_server(timeout_sec=2.0):
+        self._tf_cache[msg.header.frame_id] = (self.get_clock().now().nanoseconds * 1e-9, transform)
+        self.send_transformed_goal(msg, transform)
+
+    def send_transformed_goal(self, msg: PoseStamped, transform: TransformStamped):
+        if not self._move_client.server_is_ready():
             self.get_logger().warn("MoveRelativeXY action server not available!")
             return
 
-        goal_msg = MoveRelativeXY.Goal()
-        goal_msg.x = transformed_goal.position.x
-        goal_msg.y = transformed_goal.position.y
+        t = transform.transform.translation
+        tq = transform.transform.rotation
+        p = msg.pose.position
+        q = msg.pose.orientation
 
-        q = transformed_goal.orientation
-        yaw = euler_from_quaternion([q.x, q.y, q.z, q.w])[2]
-        goal_msg.yaw = yaw
+        goal_msg = self._goal_msg
+        goal_msg.x, goal_msg.y, goal_msg.yaw = transform_pose_yaw(
+            t.x, t.y, tq.x, tq.y, tq.z, tq.w, p.x, p.y, p.z, q.x, q.y, q.z, q.w
+        )
 
         self.get_logger().info(f"Transformed goal:\nx: {goal_msg.x:.2f}, y: {goal_msg.y:.2f}, yaw: {goal_msg.yaw:.2f}")
 
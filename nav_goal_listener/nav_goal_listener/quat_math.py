@@ -0,0 +1,43 @@
+"""Quaternion helpers for transforming navigation goals."""
+
+import math
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to plain Python
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def rotate_vec_by_quat(qx, qy, qz, qw, vx, vy, vz):
+    # v' = v + w * t + q x t, with t = 2 * (q x v)
+    tx = 2.0 * (qy * vz - qz * vy)
+    ty = 2.0 * (qz * vx - qx * vz)
+    tz = 2.0 * (qx * vy - qy * vx)
+    return (
+        vx + qw * tx + (qy * tz - qz * ty),
+        vy + qw * ty + (qz * tx - qx * tz),
+        vz + qw * tz + (qx * ty - qy * tx),
+    )
+
+
+@njit(cache=True, fastmath=True)
+def transform_pose_yaw(tx, ty, tqx, tqy, tqz, tqw, px, py, pz, qx, qy, qz, qw):
+    # Transform a pose and return only its planar position and yaw in the target frame
+    rx, ry, _ = rotate_vec_by_quat(tqx, tqy, tqz, tqw, px, py, pz)
+    x = tx + rx
+    y = ty + ry
+
+    # Hamilton product q_t * q_pose, then the yaw of the result
+    ow = tqw * qw - tqx * qx - tqy * qy - tqz * qz
+    ox = tqw * qx + tqx * qw + tqy * qz - tqz * qy
+    oy = tqw * qy - tqx * qz + tqy * qw + tqz * qx
+    oz = tqw * qz + tqx * qy - tqy * qx + tqz * qw
+    yaw = math.atan2(2.0 * (ow * oz + ox * oy), 1.0 - 2.0 * (oy * oy + oz * oz))
+
+    return x, y, yaw
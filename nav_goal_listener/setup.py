@@ -10,7 +10,7 @@ setup(
         ("share/ament_index/resource_index/packages", ["resource/" + package_name]),
         ("share/" + package_name, ["package.xml"]),
     ],
-    install_requires=["setuptools", "rclpy", "geometry_msgs", "tf2_ros", "tf2_geometry_msgs"],
+    install_requires=["setuptools", "rclpy", "geometry_msgs", "tf2_ros"],
     zip_safe=True,
     maintainer="root",
     maintainer_email="mspalding815@outlook.com",
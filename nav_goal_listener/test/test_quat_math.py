@@ -0,0 +1,84 @@
+import math
+import random
+
+import pytest
+from nav_goal_listener.quat_math import rotate_vec_by_quat, transform_pose_yaw
+
+IDENTITY = (0.0, 0.0, 0.0, 1.0)
+
+
+def _random_quat(rng):
+    q = [rng.gauss(0.0, 1.0) for _ in range(4)]
+    norm = math.sqrt(sum(c * c for c in q))
+    return tuple(c / norm for c in q)
+
+
+def _yaw_quat(yaw):
+    return (0.0, 0.0, math.sin(yaw / 2.0), math.cos(yaw / 2.0))
+
+
+def _rotation_matrix(qx, qy, qz, qw):
+    return [
+        [1 - 2 * (qy * qy + qz * qz), 2 * (qx * qy - qz * qw), 2 * (qx * qz + qy * qw)],
+        [2 * (qx * qy + qz * qw), 1 - 2 * (qx * qx + qz * qz), 2 * (qy * qz - qx * qw)],
+        [2 * (qx * qz - qy * qw), 2 * (qy * qz + qx * qw), 1 - 2 * (qx * qx + qy * qy)],
+    ]
+
+
+def _matmul(a, b):
+    return [[sum(a[i][k] * b[k][j] for k in range(3)) for j in range(3)] for i in range(3)]
+
+
+def _reference_transform_pose_yaw(t, tq, p, q):
+    r_t = _rotation_matrix(*tq)
+    x = t[0] + sum(r_t[0][k] * p[k] for k in range(3))
+    y = t[1] + sum(r_t[1][k] * p[k] for k in range(3))
+    r_out = _matmul(r_t, _rotation_matrix(*q))
+    return x, y, math.atan2(r_out[1][0], r_out[0][0])
+
+
+def _assert_angle_close(a, b):
+    assert math.remainder(a - b, 2.0 * math.pi) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_rotate_vec_by_quat_identity():
+    assert rotate_vec_by_quat(*IDENTITY, 1.0, 2.0, 3.0) == pytest.approx((1.0, 2.0, 3.0))
+
+
+def test_rotate_vec_by_quat_quarter_turn_about_z():
+    assert rotate_vec_by_quat(*_yaw_quat(math.pi / 2.0), 1.0, 0.0, 0.0) == pytest.approx((0.0, 1.0, 0.0), abs=1e-12)
+
+
+def test_transform_pose_yaw_identity():
+    x, y, yaw = transform_pose_yaw(0.0, 0.0, *IDENTITY, 1.5, -2.0, 0.3, *_yaw_quat(0.7))
+    assert (x, y) == pytest.approx((1.5, -2.0))
+    _assert_angle_close(yaw, 0.7)
+
+
+def test_transform_pose_yaw_pure_yaw():
+    x, y, yaw = transform_pose_yaw(1.0, 2.0, *_yaw_quat(math.pi / 2.0), 1.0, 0.0, 0.0, *_yaw_quat(0.5))
+    assert (x, y) == pytest.approx((1.0, 3.0))
+    _assert_angle_close(yaw, math.pi / 2.0 + 0.5)
+
+
+def test_transform_pose_yaw_non_planar():
+    # A quarter roll about x rotates the goal's y offset and its heading out of the ground plane
+    roll = (math.sin(math.pi / 4.0), 0.0, 0.0, math.cos(math.pi / 4.0))
+    x, y, yaw = transform_pose_yaw(0.5, 0.0, *roll, 1.0, 1.0, 0.0, *_yaw_quat(0.3))
+    assert (x, y) == pytest.approx((1.5, 0.0), abs=1e-12)
+    _assert_angle_close(yaw, 0.0)
+
+
+def test_transform_pose_yaw_matches_rotation_matrix():
+    rng = random.Random(0)
+    for _ in range(1000):
+        t = tuple(rng.uniform(-5.0, 5.0) for _ in range(3))
+        p = tuple(rng.uniform(-5.0, 5.0) for _ in range(3))
+        tq = _random_quat(rng)
+        q = _random_quat(rng)
+
+        x, y, yaw = transform_pose_yaw(t[0], t[1], *tq, *p, *q)
+        ref_x, ref_y, ref_yaw = _reference_transform_pose_yaw(t, tq, p, q)
+
+        assert (x, y) == pytest.approx((ref_x, ref_y), abs=1e-9)
+        _assert_angle_close(yaw, ref_yaw)
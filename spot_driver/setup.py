@@ -16,6 +16,7 @@ setup(
         ("share/" + package_name + "/launch", glob("launch/*.launch.py")),
         ("share/" + package_name + "/config", glob("config/*.rviz")),
         ("share/" + package_name + "/config", glob("config/*.yaml")),
+        ("share/" + package_name + "/config", glob("config/*.xml")),
     ],
     install_requires=["setuptools", "bosdyn-client", "bosdyn-api", "bosdyn-core"],
     zip_safe=True,
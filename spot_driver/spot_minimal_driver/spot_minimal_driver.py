@@ -15,7 +15,9 @@
 """A minimal ROS 2 driver for Boston Dynamics Spot robot."""
 
 import math
+import os
 import time
+from collections import deque
 from typing import Optional
 
 import bosdyn.client
@@ -38,13 +40,16 @@ from bosdyn.client.math_helpers import SE2Pose, SE3Pose, SE3Velocity
 from bosdyn.client.robot_command import RobotCommandBuilder, RobotCommandClient, blocking_stand
 from bosdyn.client.robot_state import RobotStateClient
 from bosdyn.client.world_object import WorldObjectClient, world_object_pb2
+from builtin_interfaces.msg import Time
 from geometry_msgs.msg import TransformStamped, Twist
 from nav_msgs.msg import Odometry
 from rclpy.action import ActionServer
 from rclpy.action.server import ServerGoalHandle
-from rclpy.callback_groups import ReentrantCallbackGroup
+from rclpy.callback_groups import MutuallyExclusiveCallbackGroup, ReentrantCallbackGroup
 from rclpy.executors import MultiThreadedExecutor
+from rclpy.logging import LoggingSeverity
 from rclpy.node import Node
+from rclpy.qos import DurabilityPolicy, HistoryPolicy, QoSProfile, ReliabilityPolicy
 from tf2_ros import StaticTransformBroadcaster, TransformBroadcaster
 
 from spot_action.action import MoveRelativeXY
@@ -71,6 +76,16 @@ class SpotROS2Driver(Node):
         else:
             self.get_logger().info(f"Using odometry frame: {self.odom_frame}")
 
+        # Optionally pin the driver to dedicated cores with real-time scheduling. This applies to the main thread
+        # and every thread started after it: the SDK/gRPC threads, the executor workers, and therefore every
+        # callback including the blocking move_relative_xy loop. The rclpy/DDS threads already started by
+        # Node.__init__ keep the default affinity and scheduler.
+        self.declare_parameter("cpu_affinity", "")  # comma-separated core ids, e.g. "2,3"
+        self.declare_parameter("sched_priority", 0)  # SCHED_FIFO priority, 0 keeps the default scheduler
+        cpu_affinity = self.get_parameter("cpu_affinity").get_parameter_value().string_value
+        sched_priority = self.get_parameter("sched_priority").get_parameter_value().integer_value
+        self.set_realtime_scheduling(cpu_affinity, sched_priority)
+
         self.robot: Optional[bosdyn.client.robot.Robot] = None
         self.lease_keep_alive: Optional[LeaseKeepAlive] = None
         self.estop_keep_alive: Optional[EstopKeepAlive] = None
@@ -128,11 +143,29 @@ class SpotROS2Driver(Node):
 
         # ROS 2 publishers and subscribers
         self.static_tf_broadcaster = StaticTransformBroadcaster(self)
-        self.tf_broadcaster = TransformBroadcaster(self)
+        # TF stays RELIABLE to remain compatible with the default tf2 listeners. VOLATILE and depth 1 keep the
+        # publisher eligible for shared-memory transport (see config/cyclonedds.xml).
+        tf_qos = QoSProfile(depth=1, history=HistoryPolicy.KEEP_LAST, durability=DurabilityPolicy.VOLATILE)
+        self.tf_broadcaster = TransformBroadcaster(self, qos=tf_qos)
         self.odom_publisher = self.create_publisher(Odometry, "odom", 10)
-        self.cmd_vel_subscriber = self.create_subscription(Twist, "cmd_vel", self.cmd_vel_callback, 10)
+        # Only the latest velocity command matters, so don't queue or retransmit stale ones
+        cmd_vel_qos = QoSProfile(depth=1, history=HistoryPolicy.KEEP_LAST, reliability=ReliabilityPolicy.BEST_EFFORT)
+        # cmd_vel_callback only appends to the pending command deque, so it can run concurrently
+        self.cmd_vel_subscriber = self.create_subscription(
+            Twist, "cmd_vel", self.cmd_vel_callback, cmd_vel_qos, callback_group=ReentrantCallbackGroup()
+        )
+        # Incoming velocity commands are coalesced and only the latest one is sent to the robot at 10 Hz.
+        # deque append/pop are atomic, and maxlen=1 replaces a command that has not been sent yet.
+        self._pending_cmd: deque[tuple[float, float, float, float]] = deque(maxlen=1)
+        self.cmd_vel_timer = self.create_timer(
+            0.1, self.send_pending_cmd_vel, callback_group=MutuallyExclusiveCallbackGroup()
+        )
+        # The odometry transform message is reused on every tick, so ticks must not overlap
+        self._odom_tf_msg = TransformStamped()
+        self._odom_tf_msg.header.frame_id = f"odom_{self.odom_frame}"
+        self._odom_tf_msg.child_frame_id = "base_link"
         self.robot_state_publisher = self.create_timer(
-            0.1, self.publish_robot_state, callback_group=ReentrantCallbackGroup()
+            0.1, self.publish_robot_state, callback_group=MutuallyExclusiveCallbackGroup()
         )
 
         # Action server initialization
@@ -144,7 +177,28 @@ class SpotROS2Driver(Node):
             callback_group=ReentrantCallbackGroup(),
         )
 
-        self.srv = self.create_service(GetTransform, "get_fiducial_transform", self.handle_get_transform)
+        self.srv = self.create_service(
+            GetTransform,
+            "get_fiducial_transform",
+            self.handle_get_transform,
+            callback_group=MutuallyExclusiveCallbackGroup(),
+        )
+
+    def set_realtime_scheduling(self, cpu_affinity: str, sched_priority: int):
+        """Pin the calling thread, and threads it starts later, to the given cores and switch them to SCHED_FIFO."""
+        try:
+            if cpu_affinity:
+                cores = {int(core) for core in cpu_affinity.split(",")}
+                os.sched_setaffinity(0, cores)
+                self.get_logger().info(f"Pinned driver to CPU cores: {sorted(cores)}")
+
+            if sched_priority > 0:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(sched_priority))
+                self.get_logger().info(f"Using SCHED_FIFO with priority {sched_priority}")
+
+        except (ValueError, OSError) as e:
+            # Real-time scheduling requires CAP_SYS_NICE, so keep running with the default scheduler
+            self.get_logger().warn(f"Failed to set real-time scheduling: {e}")
 
     def handle_get_transform(self, request, response):
         fiducials = self.world_object_client.list_world_objects([world_object_pb2.WORLD_OBJECT_APRILTAG]).world_objects
@@ -240,19 +294,27 @@ class SpotROS2Driver(Node):
         odom_tfrom_body = get_a_tform_b(
             robot_state.kinematic_state.transforms_snapshot, self.odom_frame, GRAV_ALIGNED_BODY_FRAME_NAME
         )
-        self.publish_transform(odom_tfrom_body, f"odom_{self.odom_frame}", "base_link")
+
+        # Stamp the transform and odometry from a single clock read
+        # TODO: sync with the robot's internal time
+        now_ns = time.clock_gettime_ns(time.CLOCK_REALTIME)
+        stamp = Time(sec=now_ns // 1_000_000_000, nanosec=now_ns % 1_000_000_000)
+
+        self.publish_transform(odom_tfrom_body, stamp)
 
         odom_vel_of_body = robot_state.kinematic_state.velocity_of_body_in_odom
-        self.publish_odometry(odom_tfrom_body, odom_vel_of_body, f"odom_{self.odom_frame}", "base_link")
+        self.publish_odometry(odom_tfrom_body, odom_vel_of_body, f"odom_{self.odom_frame}", "base_link", stamp)
 
         # TODO: Read internal robot inertial measurement and publish it but it's blocked by the Joint API license.
 
         # self.publish_transform(odom_tfrom_body, 'odom', 'base_link')
 
-    def publish_odometry(self, odom_tfrom_body: SE3Pose, odom_vel_of_body: SE3Velocity, header: str, child: str):
+    def publish_odometry(
+        self, odom_tfrom_body: SE3Pose, odom_vel_of_body: SE3Velocity, header: str, child: str, stamp: Time
+    ):
         """Publish the odometry data."""
         odom_msg = Odometry()
-        odom_msg.header.stamp = self.get_clock().now().to_msg()
+        odom_msg.header.stamp = stamp
         odom_msg.header.frame_id = header
         odom_msg.child_frame_id = child
 
@@ -266,13 +328,10 @@ class SpotROS2Driver(Node):
 
         self.odom_publisher.publish(odom_msg)
 
-    def publish_transform(self, tfrom: SE3Pose, header: str, child: str):  # type: ignore
+    def publish_transform(self, tfrom: SE3Pose, stamp: Time):  # type: ignore
         """Publish the transform from ODOM to BODY frame."""
-        t = TransformStamped()
-        # TODO: sync with the robot's internal time
-        t.header.stamp = self.get_clock().now().to_msg()
-        t.header.frame_id = header
-        t.child_frame_id = child
+        t = self._odom_tf_msg
+        t.header.stamp = stamp
         t.transform.translation.x = tfrom.position.x
         t.transform.translation.y = tfrom.position.y
         t.transform.translation.z = tfrom.position.z
@@ -284,15 +343,29 @@ class SpotROS2Driver(Node):
         self.tf_broadcaster.sendTransform(t)
 
     def cmd_vel_callback(self, msg: Twist):
-        """Convert a Twist message to a robot velocity command and send it."""
-        v_x, v_y, v_rot = msg.linear.x, msg.linear.y, msg.angular.z
+        """Store the latest Twist message to be sent as a robot velocity command."""
+        self._pending_cmd.append((msg.linear.x, msg.linear.y, msg.angular.z, time.time() + 0.5))
+
+    def send_pending_cmd_vel(self):
+        """Send the latest pending velocity command to the robot, if any."""
+        try:
+            v_x, v_y, v_rot, end_time_secs = self._pending_cmd.pop()
+        except IndexError:
+            return
 
         command = RobotCommandBuilder.synchro_velocity_command(v_x=v_x, v_y=v_y, v_rot=v_rot)
 
+        # Send the command to the robot without waiting for the RPC to complete
+        future = self.command_client.robot_command_async(command, end_time_secs=end_time_secs)
+        future.add_done_callback(self._on_cmd_vel_sent)
+        # rclpy loggers take no format arguments, so skip building the message unless it will be emitted
+        if self.get_logger().is_enabled_for(LoggingSeverity.DEBUG):
+            self.get_logger().debug(f"Sent velocity command: v_x={v_x:.3f}, v_y={v_y:.3f}, v_rot={v_rot:.3f}")
+
+    def _on_cmd_vel_sent(self, future):
+        """Report a failed velocity command RPC."""
         try:
-            # Send the command to the robot
-            self.command_client.robot_command(command, end_time_secs=time.time() + 0.5)
-            self.get_logger().debug(f"Sent velocity command: v_x={v_x}, v_y={v_y}, v_rot={v_rot}")
+            future.result()
         except (RpcError, ResponseError) as e:
             self.get_logger().error(f"Failed to send velocity command: {e}")
 
@@ -317,6 +390,7 @@ def main(args=None):
     """Initialize and run the Spot ROS 2 driver node."""
     rclpy.init(args=args)
     spot_driver_node = None
+    executor = None
 
     try:
         spot_driver_node = SpotROS2Driver()